@@ -54,6 +54,23 @@ defmodule Chatterbex do
     * `:model` - The model variant to use (`:turbo`, `:english`, `:multilingual`). Default: `:turbo`
     * `:device` - The device to use (`"cuda"`, `"cpu"`, `"mps"`). Default: `"cuda"`
     * `:name` - Optional name for the GenServer
+    * `:compile` - Compile the decoder with `torch.compile` (experimental on MPS). Compiled
+      graphs are cached in `~/.cache/chatterbex/inductor` and warmed up during init,
+      so the first start is slower. Default: `false`
+    * `:dtype` - Precision for the T3 decoder (`:float32`, `:bfloat16`, `:float16`, `:auto`).
+      Half precision halves decoder weight memory and bandwidth; the vocoder stays
+      `float32` for audio quality. `:auto` picks `:bfloat16` on CUDA, `:float16` on
+      MPS and `:float32` on CPU. Default: `:float32`
+    * `:quantization` - Weight-only quantization of the T3 decoder (`:int8`, `:int4`, or
+      `nil`). Requires CUDA and the `bitsandbytes` Python package; ignored on other
+      devices. Default: `nil`
+    * `:warmup` - Run a throwaway generation before reporting ready, so the first real
+      request does not pay for kernel selection and allocator setup. Default: `true`
+    * `:weight_server` - Path to the Unix socket of a running weight server. The model is
+      attached from the server's shared memory instead of loaded from disk, so restarts
+      are fast. The server must run as the same user; keep the socket in a private
+      directory such as `$XDG_RUNTIME_DIR`. Falls back to loading from disk if the server
+      is unavailable, unresponsive or run by another user. Default: `nil`
 
   The `"mps"` device enables Metal Performance Shaders acceleration on Apple Silicon
   Macs (M1/M2/M3/M4). If MPS is unavailable, it falls back to CPU automatically.
@@ -0,0 +1,52 @@
+defmodule Chatterbex.Protocol do
+  @moduledoc """
+  Wire format for messages exchanged with the Python bridge.
+
+  The port is opened in `{:packet, 4}` mode, so the VM adds and strips the
+  outer 4-byte length prefix. Each payload is laid out as:
+
+      <<header_size::32, header::binary-size(header_size), body::binary>>
+
+  The header is a small JSON object (`type`, `status`, options, errors) and
+  the body carries raw binary data such as WAV audio, avoiding Base64 and
+  JSON encoding of large payloads. See ADR-0007 for details.
+  """
+
+  @doc """
+  Encodes a header map and optional binary body into a frame payload.
+
+  ## Examples
+
+      iex> Chatterbex.Protocol.encode(%{"type" => "ping"}) |> IO.iodata_to_binary()
+      <<0, 0, 0, 15, ~s({"type":"ping"})::binary>>
+
+  """
+  @spec encode(map(), iodata()) :: iodata()
+  def encode(header, body \\ "") when is_map(header) do
+    json = Jason.encode_to_iodata!(header)
+    [<<IO.iodata_length(json)::32>>, json, body]
+  end
+
+  @doc """
+  Decodes a frame payload into its header map and binary body.
+
+  ## Examples
+
+      iex> Chatterbex.Protocol.decode(<<0, 0, 0, 15, ~s({"status":"ok"})::binary, 1, 2>>)
+      {:ok, %{"status" => "ok"}, <<1, 2>>}
+
+      iex> Chatterbex.Protocol.decode(<<0, 0>>)
+      {:error, :malformed_frame}
+
+  """
+  @spec decode(binary()) :: {:ok, map(), binary()} | {:error, term()}
+  def decode(<<size::32, header::binary-size(size), body::binary>>) do
+    case Jason.decode(header) do
+      {:ok, %{} = decoded} -> {:ok, decoded, body}
+      {:ok, _other} -> {:error, :invalid_header}
+      {:error, _} = error -> error
+    end
+  end
+
+  def decode(_payload), do: {:error, :malformed_frame}
+end
@@ -3,16 +3,23 @@ defmodule Chatterbex.Server do
   GenServer managing the Python port for Chatterbox TTS operations.
 
   This server maintains a persistent connection to a Python process
-  that loads and runs Chatterbox models.
+  that loads and runs Chatterbox models. Requests are tagged with an id so
+  concurrent callers can be in flight at once; the bridge batches them and
+  replies in any order.
   """
 
   use GenServer
 
+  alias Chatterbex.Protocol
+
   require Logger
 
   @default_timeout :timer.minutes(5)
 
-  defstruct [:port, :model, :device, :pending, :buffer, :status]
+  # Options forwarded to the Python bridge as part of the init request
+  @model_opts [:compile, :dtype, :quantization, :warmup, :weight_server]
+
+  defstruct [:port, :model, :device, :model_opts, :pending, :next_id, :status]
 
   # Client API
 
@@ -42,8 +49,9 @@ defmodule Chatterbex.Server do
     state = %__MODULE__{
       model: model,
       device: device,
-      pending: nil,
-      buffer: "",
+      model_opts: Keyword.take(opts, @model_opts),
+      pending: %{},
+      next_id: 0,
       status: :starting
     }
 
@@ -64,11 +72,14 @@ defmodule Chatterbex.Server do
 
   @impl true
   def handle_continue(:init_model, state) do
-    request = %{
-      "type" => "init",
-      "model" => model_name(state.model),
-      "device" => state.device
-    }
+    request =
+      state.model_opts
+      |> Map.new(fn {key, value} -> {Atom.to_string(key), value} end)
+      |> Map.merge(%{
+        "type" => "init",
+        "model" => model_name(state.model),
+        "device" => state.device
+      })
 
     case send_request(state.port, request) do
       :ok ->
@@ -87,11 +98,12 @@ defmodule Chatterbex.Server do
 
   @impl true
   def handle_call({:generate, text, opts}, from, state) do
-    request = build_generate_request(text, opts, state.model)
+    id = state.next_id
+    request = text |> build_generate_request(opts, state.model) |> Map.put("id", id)
 
     case send_request(state.port, request) do
       :ok ->
-        {:noreply, %{state | pending: from}}
+        {:noreply, %{state | pending: Map.put(state.pending, id, from), next_id: id + 1}}
 
       {:error, reason} ->
         {:reply, {:error, reason}, state}
@@ -99,56 +111,43 @@ defmodule Chatterbex.Server do
   end
 
   @impl true
-  def handle_info({port, {:data, {:eol, line}}}, %{port: port, status: :initializing} = state) do
-    # During initialization, skip non-JSON lines (progress bars, warnings, etc.)
-    data = state.buffer <> line
-
-    case parse_response(data) do
-      {:ok, %{"status" => "ok"}, _} ->
+  def handle_info({port, {:data, data}}, %{port: port, status: :initializing} = state) do
+    case Protocol.decode(data) do
+      {:ok, %{"status" => "ok"}, _body} ->
         Logger.info("Chatterbex model #{state.model} initialized successfully")
-        {:noreply, %{state | buffer: "", status: :ready}}
+        {:noreply, %{state | status: :ready}}
 
-      {:ok, %{"status" => "error", "error" => error}, _} ->
+      {:ok, %{"status" => "error", "error" => error}, _body} ->
         Logger.error("Chatterbex model init failed: #{error}")
         {:stop, {:init_error, error}, state}
 
       _ ->
-        # Not valid JSON - skip this line (progress bar, warning, etc.)
-        {:noreply, %{state | buffer: ""}}
+        Logger.warning("Chatterbex ignoring unexpected frame during initialization")
+        {:noreply, state}
     end
   end
 
   @impl true
-  def handle_info({port, {:data, {:eol, line}}}, %{port: port} = state) do
-    # Complete line received - parse it
-    data = state.buffer <> line
-
-    case parse_response(data) do
-      {:ok, response, _rest} ->
-        state = %{state | buffer: ""}
-        handle_response(response, state)
-
-      :incomplete ->
-        # Shouldn't happen with complete lines, but handle gracefully
-        {:noreply, %{state | buffer: ""}}
-    end
-  end
+  def handle_info({port, {:data, data}}, %{port: port} = state) do
+    case Protocol.decode(data) do
+      {:ok, response, body} ->
+        handle_response(response, body, state)
 
-  @impl true
-  def handle_info({port, {:data, {:noeol, partial}}}, %{port: port} = state) do
-    # Partial line - buffer it
-    {:noreply, %{state | buffer: state.buffer <> partial}}
+      {:error, reason} ->
+        Logger.warning("Chatterbex received malformed frame: #{inspect(reason)}")
+        {:noreply, state}
+    end
   end
 
   @impl true
   def handle_info({port, {:exit_status, status}}, %{port: port} = state) do
     Logger.error("Chatterbex Python process exited with status #{status}")
 
-    if state.pending do
-      GenServer.reply(state.pending, {:error, :port_closed})
+    for {_id, from} <- state.pending do
+      GenServer.reply(from, {:error, :port_closed})
     end
 
-    {:stop, {:port_exit, status}, %{state | port: nil, pending: nil}}
+    {:stop, {:port_exit, status}, %{state | port: nil, pending: %{}}}
   end
 
   @impl true
@@ -175,7 +174,7 @@ defmodule Chatterbex.Server do
           :exit_status,
           {:args, [python_script]},
           {:env, python_env(state)},
-          {:line, 1_000_000}
+          {:packet, 4}
         ])
 
       {:ok, port}
@@ -237,42 +236,29 @@ defmodule Chatterbex.Server do
   defp maybe_put(map, key, value), do: Map.put(map, key, value)
 
   defp send_request(port, request) do
-    json = Jason.encode!(request)
-    Port.command(port, json <> "\n")
+    Port.command(port, Protocol.encode(request))
     :ok
   rescue
     ArgumentError -> {:error, :port_closed}
   end
 
-  defp parse_response(data) do
-    # Handle line-based output from port
-    data = String.trim_trailing(data, "\n")
-
-    case Jason.decode(data) do
-      {:ok, response} -> {:ok, response, ""}
-      {:error, _} -> :incomplete
-    end
+  defp handle_response(%{"id" => id} = response, body, %{pending: pending} = state)
+       when is_map_key(pending, id) do
+    {from, pending} = Map.pop(pending, id)
+    GenServer.reply(from, reply(response, body))
+    {:noreply, %{state | pending: pending}}
   end
 
-  defp handle_response(%{"status" => "ok", "audio" => audio_base64}, state) do
-    audio = Base.decode64!(audio_base64)
-
-    if state.pending do
-      GenServer.reply(state.pending, {:ok, audio})
-    end
-
-    {:noreply, %{state | pending: nil}}
-  end
-
-  defp handle_response(%{"status" => "error", "error" => error}, state) do
-    if state.pending do
-      GenServer.reply(state.pending, {:error, error})
-    end
-
-    {:noreply, %{state | pending: nil}}
+  defp handle_response(%{"status" => "error", "error" => error}, _body, state) do
+    Logger.warning("Chatterbex bridge error: #{error}")
+    {:noreply, state}
   end
 
-  defp handle_response(_response, state) do
+  defp handle_response(_response, _body, state) do
     {:noreply, state}
   end
+
+  defp reply(%{"status" => "ok"}, audio), do: {:ok, audio}
+  defp reply(%{"status" => "error", "error" => error}, _body), do: {:error, error}
+  defp reply(response, _body), do: {:error, {:unexpected_response, response}}
 end
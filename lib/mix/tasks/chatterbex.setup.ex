@@ -210,7 +210,8 @@ defmodule Mix.Tasks.Chatterbex.Setup do
 
   defp build_package_list(opts) do
     base_packages = [
-      {"chatterbox-tts", ["chatterbox-tts"]}
+      {"chatterbox-tts", ["chatterbox-tts"]},
+      {"orjson", ["orjson"]}
     ]
 
     cond do
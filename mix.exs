@@ -69,7 +69,10 @@ defmodule Chatterbex.MixProject do
         "docs/adr/0003-json-base64-ipc-protocol.md",
         "docs/adr/0004-mix-task-for-python-setup.md",
         "docs/adr/0005-apple-silicon-mps-support.md",
-        "docs/adr/0006-native-elixir-model-execution.md"
+        "docs/adr/0006-native-elixir-model-execution.md",
+        "docs/adr/0007-length-prefixed-binary-ipc-protocol.md",
+        "docs/adr/0008-defer-cuda-graph-capture.md",
+        "docs/adr/0009-shared-weight-server.md"
       ],
       groups_for_extras: [
         Examples: ~r/examples\//,
@@ -2,41 +2,311 @@
 """
 Chatterbex Bridge - Python bridge for Elixir Chatterbex library.
 
-This script communicates with the Elixir GenServer via stdin/stdout,
-loading and running Chatterbox TTS models.
+This script communicates with the Elixir GenServer via length-prefixed
+binary frames on stdin/stdout (see ADR-0007), loading and running
+Chatterbox TTS models.
 """
 
 import sys
+import argparse
+import contextlib
+import functools
+import importlib
+import inspect
 import json
-import base64
-import io
 import os
+import pickle
+import queue
+import socket
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Force eager attention to avoid SDPA compatibility issues with output_attentions
 os.environ["ATTN_IMPLEMENTATION"] = "eager"
 
-# Attempt to import torch and torchaudio early to catch missing deps
+# Persist torch.compile artifacts so restarts reuse compiled graphs
+os.environ.setdefault(
+    "TORCHINDUCTOR_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "chatterbex", "inductor"),
+)
+
+# orjson is optional; it parses and emits bytes directly and is faster than json
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# Every frame is a 4-byte big-endian payload length (Erlang's {:packet, 4}).
+# The payload is a 4-byte big-endian header length, a JSON header and a raw body.
+_U32 = struct.Struct(">I")
+
+# Bytes requested per read from stdin; larger frames are read in one go
+READ_CHUNK_SIZE = 65536
+
+# Canonical 44-byte RIFF/WAVE header for uncompressed PCM
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Frames are written from more than one thread
+_write_lock = threading.Lock()
+
+
+def _claim_protocol_streams():
+    """
+    Take ownership of stdin/stdout for framed IPC.
+
+    Libraries print progress bars and warnings to stdout, which would corrupt
+    the binary frames. The original stdout is duplicated for protocol use and
+    file descriptor 1 is redirected to stderr.
+    """
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return FrameReader(sys.stdin.fileno()), protocol_out
+
+
+def _read_exact(stream, size: int):
+    """Read exactly `size` bytes, returning None on EOF."""
+    data = stream.read(size)
+    if len(data) < size:
+        return None
+    return data
+
+
+class FrameReader:
+    """
+    Parse frames from a raw file descriptor.
+
+    Reads large chunks with os.read into a bytearray and splits complete
+    frames out of it, bypassing Python's text and line buffering layers.
+    """
+
+    def __init__(self, fd: int, chunk_size: int = READ_CHUNK_SIZE):
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+
+    def read_frame(self):
+        """
+        Read one frame, returning `(header, body)` or None on EOF.
+
+        A malformed payload is consumed before the error is raised, so the
+        next call resumes at the following frame.
+        """
+        while True:
+            needed = _U32.size
+            if len(self.buffer) >= _U32.size:
+                (payload_size,) = _U32.unpack_from(self.buffer)
+                frame_end = _U32.size + payload_size
+                if len(self.buffer) >= frame_end:
+                    payload = bytes(self.buffer[_U32.size:frame_end])
+                    del self.buffer[:frame_end]
+                    return _decode_payload(payload)
+                needed = frame_end
+
+            chunk = os.read(self.fd, max(self.chunk_size, needed - len(self.buffer)))
+            if not chunk:
+                return None
+            self.buffer += chunk
+
+
+def _decode_payload(payload: bytes):
+    """Split a frame payload into its JSON header and raw body."""
+    (header_size,) = _U32.unpack_from(payload)
+    header_end = _U32.size + header_size
+    header = _json_loads(payload[_U32.size:header_end])
+    return header, payload[header_end:]
+
+
+def write_frame(stream, header: dict, body: bytes = b"") -> None:
+    """Write one frame with a JSON header and an optional raw body."""
+    header_bytes = _json_dumps(header)
+    payload_size = _U32.size + len(header_bytes) + len(body)
+    with _write_lock:
+        stream.write(_U32.pack(payload_size))
+        stream.write(_U32.pack(len(header_bytes)))
+        stream.write(header_bytes)
+        stream.write(body)
+        stream.flush()
+
+
+_protocol_in, _protocol_out = _claim_protocol_streams()
+
+# Attempt to import torch early to catch missing deps
 try:
     import torch
-    import torchaudio as ta
+    # Registers reducers that share tensors (CUDA IPC / shared memory) when pickling
+    import torch.multiprocessing
 except ImportError as e:
-    print(json.dumps({"status": "error", "error": f"Missing dependency: {e}"}))
+    write_frame(_protocol_out, {"status": "error", "error": f"Missing dependency: {e}"})
     sys.exit(1)
 
 # Monkey patch torch.load to handle CUDA->CPU/MPS device mapping
 # This is needed because Chatterbox models are saved with CUDA references
 _original_torch_load = torch.load
 
+# Keyword arguments this torch version accepts (weights_only needs 1.13, mmap 2.1)
+_TORCH_LOAD_PARAMS = inspect.signature(_original_torch_load).parameters
+
 
 def _patched_torch_load(f, map_location=None, **kwargs):
-    """Patched torch.load that maps CUDA tensors to CPU for compatibility."""
+    """
+    Patched torch.load that maps CUDA tensors to CPU and loads checkpoints fast.
+
+    weights_only=True uses the restricted unpickler; a checkpoint it rejects
+    fails to load rather than falling back to full unpickling. Loads from a
+    path use mmap=True, so tensors are paged in from the file instead of
+    being read and copied into RAM up front. Legacy (non-zip) checkpoints
+    cannot be memory-mapped and are loaded again without it. Explicit caller
+    arguments win, and options this torch version lacks are not passed.
+    """
     if map_location is None:
         map_location = "cpu"
+
+    if "weights_only" in _TORCH_LOAD_PARAMS:
+        kwargs.setdefault("weights_only", True)
+
+    if "mmap" in kwargs or "mmap" not in _TORCH_LOAD_PARAMS or not isinstance(f, (str, os.PathLike)):
+        return _original_torch_load(f, map_location=map_location, **kwargs)
+
+    try:
+        return _original_torch_load(f, map_location=map_location, mmap=True, **kwargs)
+    except RuntimeError as e:
+        # torch raises this for checkpoints not saved in the zipfile format
+        if "mmap" not in str(e):
+            raise
     return _original_torch_load(f, map_location=map_location, **kwargs)
 
 
 torch.load = _patched_torch_load
 
+# Import model classes while the process boots rather than on the init
+# request. Failures are recorded per model type and reported at init.
+_MODEL_IMPORTS = {
+    "turbo": ("chatterbox.tts_turbo", "ChatterboxTurboTTS"),
+    "english": ("chatterbox.tts", "ChatterboxTTS"),
+    "multilingual": ("chatterbox.mtl_tts", "ChatterboxMultilingualTTS"),
+}
+
+MODEL_CLASSES = {}
+_model_import_errors = {}
+
+for _model_type, (_module_name, _class_name) in _MODEL_IMPORTS.items():
+    try:
+        MODEL_CLASSES[_model_type] = getattr(importlib.import_module(_module_name), _class_name)
+    except Exception as e:
+        _model_import_errors[_model_type] = e
+
+# Phrases of increasing length used to warm up the model at init time. Plain
+# eager models only need the first; compiled models are warmed with all of
+# them to cover typical request lengths.
+WARMUP_TEXTS = (
+    "Hello.",
+    "Warming up the speech model.",
+    "This longer sentence warms up the decoder for typical request lengths before real traffic arrives.",
+)
+
+# Dynamic batching: collect up to MAX_BATCH generate requests that are
+# already queued, without waiting for more to arrive
+MAX_BATCH = 8
+
+# Accepted types for generate request fields; any field may also be absent
+GENERATE_FIELDS = {
+    "text": str,
+    "audio_prompt": str,
+    "language": str,
+    "exaggeration": (int, float),
+    "cfg_weight": (int, float),
+}
+
+# Threads that encode and send finished audio off the inference thread
+POST_WORKERS = 2
+
+# Seconds to wait on a weight server when connecting and for each read
+WEIGHT_SERVER_TIMEOUT = 30.0
+
+# struct ucred returned by SO_PEERCRED: pid, uid, gid
+_PEERCRED = struct.Struct("3i")
+
+# Number of prepared voice conditionals (reference audio embeddings) to keep
+CONDITIONALS_CACHE_SIZE = 64
+
+# Submodules invoked through __call__ in the hot path, compiled in place
+COMPILE_TARGETS = (("t3", "tfmr"), ("s3gen", "flow", "decoder", "estimator"))
+
+_DTYPES = {
+    "float32": torch.float32,
+    "bfloat16": torch.bfloat16,
+    "float16": torch.float16,
+}
+
+
+def _resolve_dtype(requested_dtype: str, device: str) -> torch.dtype:
+    """
+    Resolve the inference dtype for the device.
+
+    "auto" picks bfloat16 on CUDA (float16 before Ampere), float16 on MPS and
+    float32 on CPU. Half precision halves T3 weight memory and the bandwidth
+    needed to stream those weights on every decoding step.
+    """
+    if requested_dtype == "auto":
+        requested_dtype = {"cuda": "bfloat16", "mps": "float16"}.get(device, "float32")
+
+    if requested_dtype not in _DTYPES:
+        raise ValueError(f"Unknown dtype: {requested_dtype}")
+
+    dtype = _DTYPES[requested_dtype]
+    if dtype is torch.bfloat16 and device == "cuda" and not torch.cuda.is_bf16_supported():
+        return torch.float16
+    if dtype is torch.bfloat16 and device == "mps":
+        # bfloat16 matmuls are slow or unsupported on MPS
+        return torch.float16
+    if dtype is torch.float16 and device == "cpu":
+        # CPU autocast only supports bfloat16
+        return torch.bfloat16
+    return dtype
+
+
+def _replace_linear_with_quantized(module, quantization: str, compute_dtype: torch.dtype) -> None:
+    """
+    Recursively swap nn.Linear layers for bitsandbytes weight-only quantized layers.
+
+    Weights are quantized when the new layer is moved to CUDA, so they are
+    staged on the CPU first.
+    """
+    import bitsandbytes as bnb
+
+    for name, child in module.named_children():
+        if not isinstance(child, torch.nn.Linear):
+            _replace_linear_with_quantized(child, quantization, compute_dtype)
+            continue
+
+        has_bias = child.bias is not None
+        weight = child.weight.data.to("cpu")
+        if quantization == "int8":
+            layer = bnb.nn.Linear8bitLt(
+                child.in_features, child.out_features, bias=has_bias,
+                has_fp16_weights=False, threshold=6.0,
+            )
+            layer.weight = bnb.nn.Int8Params(weight, requires_grad=False, has_fp16_weights=False)
+        else:
+            layer = bnb.nn.Linear4bit(
+                child.in_features, child.out_features, bias=has_bias,
+                compute_dtype=compute_dtype, quant_type="nf4",
+            )
+            layer.weight = bnb.nn.Params4bit(weight, requires_grad=False, quant_type="nf4")
+
+        if has_bias:
+            layer.bias = torch.nn.Parameter(child.bias.data.to("cpu"), requires_grad=False)
+
+        setattr(module, name, layer.to("cuda"))
+
 
 def _detect_device(requested_device: str) -> str:
     """
@@ -63,8 +333,23 @@ class ChatterboxBridge:
         self.model = None
         self.model_type = None
         self.device = None
-
-    def init_model(self, model_type: str, device: str = "cuda") -> dict:
+        self.dtype = torch.float32
+        self._default_conds = None
+        self._conditionals = functools.lru_cache(maxsize=CONDITIONALS_CACHE_SIZE)(
+            self._prepare_conditionals
+        )
+        self._post = ThreadPoolExecutor(max_workers=POST_WORKERS, thread_name_prefix="chatterbex-post")
+
+    def init_model(
+        self,
+        model_type: str,
+        device: str = "cuda",
+        compile: bool = False,
+        dtype: str = "float32",
+        quantization=None,
+        warmup: bool = True,
+        weight_server=None,
+    ) -> dict:
         """Initialize the specified Chatterbox model."""
         try:
             # Validate and detect actual device
@@ -76,27 +361,49 @@ class ChatterboxBridge:
             # This avoids "Placeholder storage has not been allocated on MPS device" errors
             load_device = "cpu" if actual_device == "mps" else actual_device
 
-            if model_type == "turbo":
-                from chatterbox.tts_turbo import ChatterboxTurboTTS
-                self.model = ChatterboxTurboTTS.from_pretrained(device=load_device)
+            if model_type not in _MODEL_IMPORTS:
+                return {"status": "error", "error": f"Unknown model type: {model_type}"}
 
-            elif model_type == "english":
-                from chatterbox.tts import ChatterboxTTS
-                self.model = ChatterboxTTS.from_pretrained(device=load_device)
+            if quantization not in (None, "int8", "int4"):
+                return {"status": "error", "error": f"Unknown quantization: {quantization}"}
 
-            elif model_type == "multilingual":
-                from chatterbox.mtl_tts import ChatterboxMultilingualTTS
-                self.model = ChatterboxMultilingualTTS.from_pretrained(device=load_device)
+            if model_type in _model_import_errors:
+                return {"status": "error", "error": str(_model_import_errors[model_type])}
+
+            self.model = None
+            if weight_server:
+                try:
+                    self.model = _attach_shared_model(weight_server, model_type, load_device)
+                except Exception as e:
+                    print(f"Weight server unavailable, loading from disk: {e}", file=sys.stderr)
+
+            if self.model is None:
+                self.model = MODEL_CLASSES[model_type].from_pretrained(device=load_device)
+
+            if model_type == "multilingual":
                 # Fix SDPA attention compatibility issue with output_attentions
                 self._fix_attention_implementation()
 
-            else:
-                return {"status": "error", "error": f"Unknown model type: {model_type}"}
-
             # Move model components to MPS if requested
             if actual_device == "mps" and load_device == "cpu":
                 self._move_to_mps()
 
+            self._default_conds = getattr(self.model, "conds", None)
+            self._conditionals.cache_clear()
+
+            self.dtype = _resolve_dtype(dtype, self.device)
+            if self.dtype != torch.float32:
+                self._convert_precision()
+
+            if quantization and self.device == "cuda":
+                self._quantize_decoder(quantization)
+
+            if compile:
+                self._compile_model()
+
+            if warmup:
+                self._warmup(WARMUP_TEXTS if compile else WARMUP_TEXTS[:1])
+
             return {"status": "ok", "device": actual_device}
 
         except Exception as e:
@@ -127,6 +434,89 @@ class ChatterboxBridge:
             if hasattr(self.model, "device"):
                 self.model.device = "cpu"
 
+    def _convert_precision(self) -> None:
+        """
+        Keep T3 weights in half precision and pin the vocoder to float32.
+
+        T3 dominates the parameter count, so it gets the memory and bandwidth
+        savings. S3Gen is small and audio quality is sensitive to its
+        precision, so autocast is disabled around its inference.
+        """
+        if getattr(self.model, "t3", None) is not None:
+            self.model.t3 = self.model.t3.to(dtype=self.dtype)
+
+        s3gen = getattr(self.model, "s3gen", None)
+        if s3gen is not None and hasattr(s3gen, "inference"):
+            inference = s3gen.inference
+
+            @functools.wraps(inference)
+            def float32_inference(*args, **kwargs):
+                with torch.autocast(device_type=self.device, enabled=False):
+                    return inference(*args, **kwargs)
+
+            s3gen.inference = float32_inference
+
+    def _quantize_decoder(self, quantization: str) -> None:
+        """
+        Apply int8 or 4-bit (NF4) weight-only quantization to the T3 transformer.
+
+        T3 holds most of the parameters and decoding is bound by streaming
+        its weights, so smaller weights decode faster. The vocoder is left
+        alone because it is small and audio quality is sensitive to it.
+        """
+        decoder = getattr(getattr(self.model, "t3", None), "tfmr", None)
+        if decoder is None:
+            return
+
+        compute_dtype = self.dtype if self.dtype != torch.float32 else torch.float16
+        _replace_linear_with_quantized(decoder, quantization, compute_dtype)
+
+    def _autocast(self):
+        """Return the autocast context for generation at the configured dtype."""
+        if self.dtype == torch.float32:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device, dtype=self.dtype)
+
+    def _compile_model(self) -> None:
+        """
+        Compile hot-path submodules with torch.compile.
+
+        Uses the default mode, which fuses elementwise ops into fewer kernels
+        and cuts per-op dispatch overhead. reduce-overhead mode is avoided:
+        the decoder's DynamicCache grows by one token per step, so inductor
+        would record a new CUDA graph for nearly every decoded token. Modules
+        are compiled in place so Chatterbox's own references to them stay
+        valid. FX graphs are cached on disk under TORCHINDUCTOR_CACHE_DIR.
+        """
+        import torch._inductor.config as inductor_config
+
+        torch.set_float32_matmul_precision("high")
+        inductor_config.fx_graph_cache = True
+        if hasattr(inductor_config, "fx_graph_remote_cache"):
+            inductor_config.fx_graph_remote_cache = False
+
+        for path in COMPILE_TARGETS:
+            module = self.model
+            for name in path:
+                module = getattr(module, name, None)
+            if isinstance(module, torch.nn.Module):
+                module.compile(mode="default")
+
+    def _warmup(self, texts) -> None:
+        """
+        Run throwaway generations so the first real request is not cold.
+
+        Moves kernel autotuning, allocator growth and torch.compile
+        compilation into initialization. Goes through the same path as real
+        requests, with a language set because the multilingual model
+        requires one. Failures only mean a slower first request, so they
+        are logged rather than failing init.
+        """
+        for text in texts:
+            response = self.generate(text, language="en").result()
+            if response["status"] == "error":
+                print(f"Warmup generation failed: {response['error']}", file=sys.stderr)
+
     def _fix_attention_implementation(self) -> None:
         """
         Fix SDPA attention compatibility issues.
@@ -160,93 +550,375 @@ class ChatterboxBridge:
                     if hasattr(submodule, "_attn_implementation"):
                         submodule._attn_implementation = "eager"
 
-    def generate(self, text: str, **kwargs) -> dict:
-        """Generate speech from text."""
+    def generate(
+        self,
+        text: str,
+        audio_prompt=None,
+        language=None,
+        exaggeration=None,
+        cfg_weight=None,
+    ) -> Future:
+        """
+        Generate speech from text.
+
+        Returns a future resolving to the response. WAV encoding runs on the
+        post-processing pool, so the inference thread can start on the next
+        request straight away.
+        """
         if self.model is None:
-            return {"status": "error", "error": "Model not initialized"}
+            return _completed({"status": "error", "error": "Model not initialized"})
 
         try:
             # Build generation arguments
             gen_kwargs = {}
 
-            if "audio_prompt" in kwargs and kwargs["audio_prompt"]:
-                gen_kwargs["audio_prompt_path"] = kwargs["audio_prompt"]
+            self._select_conditionals(audio_prompt)
 
-            if self.model_type == "multilingual" and "language" in kwargs:
-                gen_kwargs["language_id"] = kwargs["language"]
+            if self.model_type == "multilingual" and language is not None:
+                gen_kwargs["language_id"] = language
 
             if self.model_type == "english":
-                if "exaggeration" in kwargs and kwargs["exaggeration"] is not None:
-                    gen_kwargs["exaggeration"] = kwargs["exaggeration"]
-                if "cfg_weight" in kwargs and kwargs["cfg_weight"] is not None:
-                    gen_kwargs["cfg_weight"] = kwargs["cfg_weight"]
+                if exaggeration is not None:
+                    gen_kwargs["exaggeration"] = exaggeration
+                if cfg_weight is not None:
+                    gen_kwargs["cfg_weight"] = cfg_weight
 
             # Generate audio
-            wav = self.model.generate(text, **gen_kwargs)
+            with self._autocast():
+                wav = self.model.generate(text, **gen_kwargs)
 
-            # Convert to WAV bytes
-            audio_bytes = self._wav_to_bytes(wav, self.model.sr)
+            # Chatterbox returns the watermarked waveform as a CPU tensor
+            # (torch.from_numpy), so there is no device-to-host copy to stage
+            return self._post.submit(self._encode_response, wav, self.model.sr)
 
-            # Encode as base64 for JSON transport
-            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        except Exception as e:
+            return _completed({"status": "error", "error": str(e)})
 
-            return {"status": "ok", "audio": audio_base64}
+    def _encode_response(self, wav: torch.Tensor, sample_rate: int) -> dict:
+        """Post-processing worker - encode generated audio as WAV bytes."""
+        try:
+            # Convert to WAV bytes, sent as the raw frame body
+            return {"status": "ok", "audio": self._wav_to_bytes(wav, sample_rate)}
 
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
+    def _select_conditionals(self, audio_prompt) -> None:
+        """
+        Point the model at the conditionals for this request's voice.
+
+        Chatterbox re-encodes the reference audio (voice encoder, speech
+        tokenizer, mel extraction) on every call that passes
+        `audio_prompt_path`. Reusing the cached result means each reference
+        clip is encoded once. Requests without a prompt get the model's
+        built-in voice back rather than the last cloned one.
+        """
+        if not audio_prompt:
+            if self._default_conds is not None:
+                self.model.conds = self._default_conds
+            return
+
+        # Keyed on mtime so an overwritten reference file is re-encoded
+        self.model.conds = self._conditionals(audio_prompt, os.stat(audio_prompt).st_mtime_ns)
+
+    def _prepare_conditionals(self, audio_prompt: str, _mtime_ns: int):
+        """Encode a reference clip into model conditionals (cached via lru_cache)."""
+        self.model.prepare_conditionals(audio_prompt)
+        return self.model.conds
+
     def _wav_to_bytes(self, wav: torch.Tensor, sample_rate: int) -> bytes:
-        """Convert a PyTorch tensor to WAV bytes."""
-        buffer = io.BytesIO()
+        """
+        Convert a PyTorch tensor to 16-bit PCM WAV bytes.
 
+        The header is packed directly and the body is the tensor's raw
+        memory, avoiding a round trip through torchaudio/libsndfile and BytesIO.
+        """
         # Ensure correct shape (channels, samples)
         if wav.dim() == 1:
             wav = wav.unsqueeze(0)
 
-        ta.save(buffer, wav.cpu(), sample_rate, format="wav")
-        buffer.seek(0)
-        return buffer.read()
+        channels = wav.shape[0]
+        # WAV interleaves channels, so store as (samples, channels)
+        pcm = (wav.clamp(-1, 1) * 32767).to(torch.int16).t().contiguous()
+        data = pcm.cpu().numpy().astype("<i2", copy=False).tobytes()
 
+        header = _WAV_HEADER.pack(
+            b"RIFF", 36 + len(data), b"WAVE",
+            b"fmt ", 16, 1, channels, sample_rate,
+            sample_rate * channels * 2, channels * 2, 16,
+            b"data", len(data),
+        )
+        return header + data
 
-def main():
-    """Main loop - read JSON commands from stdin, write responses to stdout."""
-    bridge = ChatterboxBridge()
 
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+def _attach_shared_model(socket_path: str, model_type: str, device: str):
+    """
+    Fetch a model from a weight server instead of loading it from disk.
+
+    The server sends the whole model pickled with torch's reducers, so
+    CUDA tensors arrive as IPC handles and CPU tensors as shared memory.
+    Unpickling maps the server's weights rather than copying them.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        # A server that accepts but never answers must not block init forever
+        conn.settimeout(WEIGHT_SERVER_TIMEOUT)
+        conn.connect(socket_path)
+        _verify_weight_server(conn, socket_path)
+        stream = conn.makefile("rb")
+        prefix = _read_exact(stream, _U32.size)
+        payload = None if prefix is None else _read_exact(stream, _U32.unpack(prefix)[0])
+        if payload is None:
+            raise ConnectionError("Weight server closed the connection")
+
+        served_type, served_device, model = pickle.loads(payload)
+
+    if (served_type, served_device) != (model_type, device):
+        raise ValueError(
+            f"Weight server has {served_type} on {served_device}, wanted {model_type} on {device}"
+        )
+    return model
+
+
+def _verify_weight_server(conn, socket_path: str) -> None:
+    """
+    Refuse a weight server run by another user.
+
+    Its payload is unpickled, so whoever binds the socket path can run code
+    in the bridge. On Linux the peer's uid is checked with SO_PEERCRED.
+    Elsewhere the socket must be owned by this user with mode 0600, in a
+    directory owned by this user that no one else can write to.
+    """
+    uid = os.getuid()
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+        _pid, peer_uid, _gid = _PEERCRED.unpack(creds)
+        if peer_uid != uid:
+            raise PermissionError(
+                f"Weight server at {socket_path} is run by uid {peer_uid}, not {uid}"
+            )
+        return
+
+    socket_stat = os.stat(socket_path)
+    if socket_stat.st_uid != uid or socket_stat.st_mode & 0o077:
+        raise PermissionError(
+            f"Weight server socket {socket_path} must be owned by uid {uid} with mode 0600"
+        )
+
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    directory_stat = os.stat(directory)
+    if directory_stat.st_uid != uid or directory_stat.st_mode & 0o022:
+        raise PermissionError(
+            f"Weight server directory {directory} must be owned by uid {uid} "
+            "and not writable by others"
+        )
+
+
+def serve_weights(socket_path: str, model_type: str, device: str) -> None:
+    """
+    Load a model once and share its weights with bridge processes.
+
+    Keeps the weights resident (in GPU memory on CUDA) so a restarted
+    bridge attaches in well under a second instead of reloading
+    checkpoints. The socket is created accessible only to the current user,
+    since clients unpickle what it sends.
+    """
+    from multiprocessing.reduction import ForkingPickler
+
+    device = _detect_device(device)
+    # There is no IPC for MPS tensors, so share from CPU and let the bridge move them
+    load_device = "cpu" if device == "mps" else device
 
+    torch.multiprocessing.set_sharing_strategy("file_system")
+    model = MODEL_CLASSES[model_type].from_pretrained(device=load_device)
+    for component in vars(model).values():
+        if isinstance(component, torch.nn.Module):
+            component.requires_grad_(False)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Create the socket as 0600 so no other user can connect in between
+        # bind() and a later chmod
+        previous_umask = os.umask(0o177)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(previous_umask)
+        server.listen()
+        print(f"Serving {model_type} weights on {load_device} at {socket_path}", file=sys.stderr)
+
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                # One failing client (pickling error, stalled reader) must not
+                # take the server down
+                try:
+                    conn.settimeout(WEIGHT_SERVER_TIMEOUT)
+                    payload = bytes(ForkingPickler.dumps((model_type, load_device, model)))
+                    conn.sendall(_U32.pack(len(payload)) + payload)
+                except Exception as e:
+                    print(f"Failed to send weights: {e}", file=sys.stderr)
+
+
+def _completed(response: dict) -> Future:
+    """Wrap an immediate response in an already-resolved future."""
+    future = Future()
+    future.set_result(response)
+    return future
+
+
+def _read_requests(reader: FrameReader, requests: queue.Queue) -> None:
+    """Producer thread - read framed requests into the queue until EOF."""
+    while True:
         try:
-            request = json.loads(line)
-        except json.JSONDecodeError as e:
-            response = {"status": "error", "error": f"Invalid JSON: {e}"}
-            print(json.dumps(response), flush=True)
+            frame = reader.read_frame()
+        except (ValueError, struct.error) as e:
+            write_frame(_protocol_out, {"status": "error", "error": f"Invalid frame: {e}"})
             continue
 
-        request_type = request.get("type")
+        if frame is None:
+            requests.put(None)
+            return
+
+        request, _body = frame
+        requests.put(request)
+
+
+def _next_batch(requests: queue.Queue) -> list:
+    """
+    Block for the next request, then drain queued generate requests into a batch.
+
+    Takes up to MAX_BATCH generate requests that are already waiting. The
+    batch runs one request at a time, so waiting for more to arrive would
+    only add latency. A control request (or EOF) closes the batch and is
+    returned last, so it is still handled after the generate requests that
+    arrived before it.
+    """
+    batch = [requests.get()]
+
+    while _is_generate(batch[-1]) and len(batch) < MAX_BATCH:
+        try:
+            batch.append(requests.get_nowait())
+        except queue.Empty:
+            break
+
+    return batch
+
+
+def _is_generate(request) -> bool:
+    return request is not None and request.get("type") == "generate"
 
-        if request_type == "init":
-            model_type = request.get("model", "turbo")
-            device = request.get("device", "cuda")
-            response = bridge.init_model(model_type, device)
 
-        elif request_type == "generate":
-            text = request.get("text", "")
-            kwargs = {
-                k: v for k, v in request.items()
-                if k not in ("type", "text")
-            }
-            response = bridge.generate(text, **kwargs)
+def _handle_request(bridge: ChatterboxBridge, request: dict) -> dict:
+    """Handle a single control (non-generate) request."""
+    request_type = request.get("type")
+
+    if request_type == "init":
+        model_type = request.get("model", "turbo")
+        device = request.get("device", "cuda")
+        return bridge.init_model(
+            model_type,
+            device,
+            compile=request.get("compile", False),
+            dtype=request.get("dtype", "float32"),
+            quantization=request.get("quantization"),
+            warmup=request.get("warmup", True),
+            weight_server=request.get("weight_server"),
+        )
+
+    elif request_type == "ping":
+        return {"status": "ok", "message": "pong"}
+
+    else:
+        return {"status": "error", "error": f"Unknown request type: {request_type}"}
 
-        elif request_type == "ping":
-            response = {"status": "ok", "message": "pong"}
 
+def _run_generate_batch(bridge: ChatterboxBridge, batch: list) -> None:
+    """
+    Run a batch of generate requests and send each response by request id.
+
+    Chatterbox generates one utterance per call, so the batch is executed
+    sequentially in arrival order. Every request is generated separately,
+    even identical ones, since sampling gives each call a different take.
+    """
+    valid = []
+    for request in batch:
+        error = _validate_generate(request)
+        if error is None:
+            valid.append(request)
         else:
-            response = {"status": "error", "error": f"Unknown request type: {request_type}"}
+            write_frame(_protocol_out, {"status": "error", "error": error, "id": request.get("id")})
+
+    for request in valid:
+        future = bridge.generate(
+            request.get("text", ""),
+            audio_prompt=request.get("audio_prompt"),
+            language=request.get("language"),
+            exaggeration=request.get("exaggeration"),
+            cfg_weight=request.get("cfg_weight"),
+        )
+        future.add_done_callback(functools.partial(_send_response, request))
+
+
+def _validate_generate(request: dict):
+    """Return an error message if a generate field has the wrong type, else None."""
+    for field, types in GENERATE_FIELDS.items():
+        value = request.get(field)
+        # bool subclasses int, so JSON true/false would pass as a number
+        if value is not None and (isinstance(value, bool) or not isinstance(value, types)):
+            return f"Invalid {field}: expected {_type_names(types)}, got {type(value).__name__}"
+    return None
+
+
+def _type_names(types) -> str:
+    if isinstance(types, tuple):
+        return " or ".join(t.__name__ for t in types)
+    return types.__name__
+
 
-        print(json.dumps(response), flush=True)
+def _send_response(request: dict, future: Future) -> None:
+    """Write a generated response for the request that asked for it."""
+    response = future.result()
+    audio = response.pop("audio", b"")
+    write_frame(_protocol_out, {**response, "id": request.get("id")}, audio)
+
+
+def main():
+    """Main loop - batch framed commands from stdin, write framed responses to stdout."""
+    bridge = ChatterboxBridge()
+    requests = queue.Queue()
+
+    reader = threading.Thread(target=_read_requests, args=(_protocol_in, requests), daemon=True)
+    reader.start()
+
+    while True:
+        batch = _next_batch(requests)
+        generate_batch = [r for r in batch if _is_generate(r)]
+        if generate_batch:
+            _run_generate_batch(bridge, generate_batch)
+
+        control = batch[-1]
+        if control is None:
+            break
+        if not _is_generate(control):
+            response = _handle_request(bridge, control)
+            response["id"] = control.get("id")
+            audio = response.pop("audio", b"")
+            write_frame(_protocol_out, response, audio)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--serve-weights", metavar="SOCKET",
+        help="run as a weight server on this Unix socket instead of as a bridge",
+    )
+    parser.add_argument("--model", default="turbo", choices=sorted(_MODEL_IMPORTS))
+    parser.add_argument("--device", default="cuda")
+    args = parser.parse_args()
+
+    if args.serve_weights:
+        serve_weights(args.serve_weights, args.model, args.device)
+    else:
+        main()
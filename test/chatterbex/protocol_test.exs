@@ -0,0 +1,37 @@
+defmodule Chatterbex.ProtocolTest do
+  use ExUnit.Case, async: true
+  doctest Chatterbex.Protocol
+
+  alias Chatterbex.Protocol
+
+  describe "encode/2 and decode/1" do
+    test "round-trips a header with a binary body" do
+      header = %{"status" => "ok", "device" => "cuda"}
+      body = <<82, 73, 70, 70, 0, 255, 10, 13>>
+
+      payload = header |> Protocol.encode(body) |> IO.iodata_to_binary()
+
+      assert {:ok, ^header, ^body} = Protocol.decode(payload)
+    end
+
+    test "round-trips a header without a body" do
+      payload = %{"type" => "init"} |> Protocol.encode() |> IO.iodata_to_binary()
+
+      assert {:ok, %{"type" => "init"}, ""} = Protocol.decode(payload)
+    end
+  end
+
+  describe "decode/1" do
+    test "rejects a header size larger than the payload" do
+      assert {:error, :malformed_frame} = Protocol.decode(<<0, 0, 0, 100, "{}">>)
+    end
+
+    test "rejects a non-object header" do
+      assert {:error, :invalid_header} = Protocol.decode(<<0, 0, 0, 2, "[]">>)
+    end
+
+    test "returns a decode error for invalid JSON" do
+      assert {:error, %Jason.DecodeError{}} = Protocol.decode(<<0, 0, 0, 3, "not">>)
+    end
+  end
+end
@@ -0,0 +1,94 @@
+defmodule Chatterbex.ServerTest do
+  use ExUnit.Case, async: true
+
+  import ExUnit.CaptureLog
+
+  alias Chatterbex.{Protocol, Server}
+
+  setup do
+    # `cat` stands in for the Python bridge: it echoes each request frame back
+    # to the test process, so tests can read the ids the server assigned
+    port = Port.open({:spawn, "cat"}, [:binary, {:packet, 4}])
+
+    state = %Server{
+      port: port,
+      model: :turbo,
+      device: "cpu",
+      model_opts: [],
+      pending: %{},
+      next_id: 0,
+      status: :ready
+    }
+
+    {:ok, port: port, state: state}
+  end
+
+  describe "concurrent generate requests" do
+    test "replies to each caller by request id, in any order", %{port: port, state: state} do
+      first = make_ref()
+      second = make_ref()
+
+      {:noreply, state} = Server.handle_call({:generate, "first", []}, {self(), first}, state)
+      {:noreply, state} = Server.handle_call({:generate, "second", []}, {self(), second}, state)
+
+      first_id = sent_request_id(port, "first")
+      second_id = sent_request_id(port, "second")
+      assert first_id != second_id
+
+      {:noreply, state} = Server.handle_info({port, {:data, ok(second_id, "two")}}, state)
+      assert_received {^second, {:ok, "two"}}
+      refute_received {^first, _}
+
+      {:noreply, state} = Server.handle_info({port, {:data, ok(first_id, "one")}}, state)
+      assert_received {^first, {:ok, "one"}}
+
+      assert state.pending == %{}
+    end
+
+    test "replies with the bridge error to the matching caller", %{port: port, state: state} do
+      caller = make_ref()
+
+      {:noreply, state} = Server.handle_call({:generate, "hello", []}, {self(), caller}, state)
+      id = sent_request_id(port, "hello")
+
+      frame = encode(%{"id" => id, "status" => "error", "error" => "boom"})
+      {:noreply, state} = Server.handle_info({port, {:data, frame}}, state)
+
+      assert_received {^caller, {:error, "boom"}}
+      assert state.pending == %{}
+    end
+
+    test "keeps pending callers on an error frame without an id", %{port: port, state: state} do
+      caller = make_ref()
+
+      {:noreply, state} = Server.handle_call({:generate, "hello", []}, {self(), caller}, state)
+      id = sent_request_id(port, "hello")
+
+      frame = encode(%{"status" => "error", "error" => "Invalid frame: truncated"})
+
+      log =
+        capture_log(fn ->
+          assert {:noreply, ^state} = Server.handle_info({port, {:data, frame}}, state)
+        end)
+
+      assert log =~ "Invalid frame: truncated"
+      refute_received {^caller, _}
+
+      {:noreply, state} = Server.handle_info({port, {:data, ok(id, "audio")}}, state)
+      assert_received {^caller, {:ok, "audio"}}
+      assert state.pending == %{}
+    end
+  end
+
+  defp sent_request_id(port, text) do
+    assert_receive {^port, {:data, data}}
+    assert {:ok, %{"type" => "generate", "text" => ^text, "id" => id}, ""} = Protocol.decode(data)
+    id
+  end
+
+  defp ok(id, audio), do: encode(%{"id" => id, "status" => "ok"}, audio)
+
+  defp encode(header, body \\ "") do
+    header |> Protocol.encode(body) |> IO.iodata_to_binary()
+  end
+end